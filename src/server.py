@@ -1,7 +1,11 @@
 import asyncio
 import threading
+from collections import deque
 from contextlib import asynccontextmanager
+import json
 import logging
+import os
+from random import Random
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
@@ -15,10 +19,13 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("FastAPI server starting")
+    if pool.high > 0:
+        pool.start()
     yield
     # Shutdown
+    await pool.stop()
     logger.info("Cleaning up RNG resources")
-    rng.end()
+    await asyncio.to_thread(_locked_end)
 
 app = FastAPI(lifespan=lifespan)
 
@@ -41,10 +48,198 @@ app.add_middleware(
 rng = RealRNG()
 rng_lock = threading.Lock()  # Serialize access to shared RNG instance
 
-async def random():
-    # Move blocking I/O to thread pool and protect with lock
+
+SOURCE_FALLBACK = 'fallback'
+
+
+class ResponsePool:
+    """
+    Pool of pre-serialized /api/random bodies, refilled by a background task.
+
+    Each entry is the JSON body up to the opening quote of the timestamp, so
+    the request handler only has to pop one entry and append the timestamp.
+    The producer tops the pool up to `high` entries whenever it drops below
+    `low`. Entries are popped exactly once, and every value handed out
+    (pooled or served inline) is checked against the last `window` values.
+    A repeat, e.g. from a stuck audio input, is replaced by a fallback value
+    so the server never hands out the same value twice.
+    """
+
+    BATCH = 32
+    DUPLICATE_BACKOFF = 1  # seconds to wait after a batch of only duplicates
+    MIN_WINDOW = 512
+
+    def __init__(self, high: int = 256, low: int = 64):
+        self.high = high
+        self.low = min(low, high)
+        self.window = max(2 * high, self.MIN_WINDOW)
+        self.entries = deque()
+        self._recent = deque()
+        self._recent_set = set()
+        self._duplicates = False
+        self._refill = None
+        self._task = None
+        # Set once shutdown begins; _generate checks it under rng_lock
+        self.stopping = threading.Event()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def start(self):
+        self.stopping.clear()
+        self._refill = asyncio.Event()
+        self._refill.set()
+        self._task = asyncio.create_task(self._produce())
+
+    async def stop(self):
+        self.stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.clear()
+
+    def clear(self):
+        """Drop all pooled entries and dedup history"""
+        self.entries.clear()
+        self._recent.clear()
+        self._recent_set.clear()
+        self._duplicates = False
+        self._refill = None
+
+    def pop(self) -> bytes | None:
+        """Take one entry, or None if the pool is empty"""
+        try:
+            entry = self.entries.popleft()
+        except IndexError:
+            entry = None
+        if self._refill is not None and len(self.entries) < self.low:
+            self._refill.set()
+        return entry
+
+    def remember(self, rand_value: float) -> bool:
+        """Record a value as handed out; returns False if it was seen recently"""
+        if rand_value in self._recent_set:
+            # Log once per run of duplicates, not once per value
+            if not self._duplicates:
+                logger.warning("RNG is producing duplicate values (audio input stuck?), "
+                               "substituting fallback values")
+                self._duplicates = True
+            return False
+
+        if self._duplicates:
+            logger.info("RNG is producing unique values again")
+            self._duplicates = False
+
+        self._recent.append(rand_value)
+        self._recent_set.add(rand_value)
+        if len(self._recent) > self.window:
+            self._recent_set.discard(self._recent.popleft())
+        return True
+
+    def unique(self, rand_value: float, source_value: str) -> tuple[float, str, bool]:
+        """
+        Record a value, replacing it with a fallback value if it is a repeat.
+
+        Returns (rand, source, original) where `original` is False if the
+        value was replaced.
+        """
+        original = True
+        while not self.remember(rand_value):
+            rand_value = Random().random()
+            source_value = SOURCE_FALLBACK
+            original = False
+        return (rand_value, source_value, original)
+
+    def add(self, rand_value: float, source_value: str) -> bool:
+        """Serialize and queue a value; returns False if it had to be replaced"""
+        (rand_value, source_value, original) = self.unique(rand_value, source_value)
+
+        self.entries.append(
+            f'{{"rand":{json.dumps(rand_value)},"source":{json.dumps(source_value)},'
+            f'"timestamp":"'.encode()
+        )
+        return original
+
+    async def _produce(self):
+        while True:
+            await self._refill.wait()
+            self._refill.clear()
+            try:
+                while len(self.entries) < self.high:
+                    count = min(self.BATCH, self.high - len(self.entries))
+                    values = await asyncio.to_thread(_generate, count, self.stopping)
+                    originals = sum(self.add(*value) for value in values)
+                    if values and not originals:
+                        # Input is stuck; don't hammer it while fallback fills in
+                        await asyncio.sleep(self.DUPLICATE_BACKOFF)
+            except Exception as e:
+                logger.error(f"Error refilling response pool: {type(e).__name__}: {e}")
+                await asyncio.sleep(1)
+                self._refill.set()
+
+
+def _locked_getRand() -> tuple[float, str]:
+    # Runs in the thread pool; the lock must never be taken on the event
+    # loop thread, or a second request would block the whole loop
+    with rng_lock:
+        return rng.getRand()
+
+
+def _generate(count: int, stopping: threading.Event) -> list[tuple[float, str]]:
+    # Take the lock per value so the slow path in random() never waits
+    # for a whole batch, and check `stopping` under the lock so no read
+    # happens after _locked_end() has closed the stream
+    values = []
+    for _ in range(count):
+        with rng_lock:
+            if stopping.is_set():
+                break
+            values.append(rng.getRand())
+    return values
+
+
+def _locked_end():
+    # Wait for any in-flight read before closing the stream
     with rng_lock:
-        (rand_value, source_value) = await asyncio.to_thread(rng.getRand)
+        rng.end()
+
+
+def _pool_config() -> tuple[int, int]:
+    """Read and validate REALRNG_POOL_HIGH / REALRNG_POOL_LOW"""
+    def read(name, default):
+        value = os.environ.get(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            logger.warning(f"Invalid {name}: {value}, using {default}")
+            return default
+
+    high = read('REALRNG_POOL_HIGH', 256)
+    if high < 0:
+        logger.warning(f"REALRNG_POOL_HIGH must be >= 0, got {high}; using 256")
+        high = 256
+
+    low = read('REALRNG_POOL_LOW', min(64, high))
+    if high > 0 and not 1 <= low <= high:
+        clamped = min(max(low, 1), high)
+        logger.warning(f"REALRNG_POOL_LOW must be between 1 and {high}, got {low}; "
+                       f"using {clamped}")
+        low = clamped
+    return (high, low)
+
+
+pool = ResponsePool(*_pool_config())
+
+async def random():
+    # Move blocking I/O to thread pool; the lock is taken inside the thread
+    (rand_value, source_value) = await asyncio.to_thread(_locked_getRand)
+    (rand_value, source_value, _) = pool.unique(rand_value, source_value)
 
     return {
         'rand': rand_value,
@@ -53,8 +248,14 @@ async def random():
     }
 
 
-@app.get('/api/random', status_code=200)
-async def api_random(response: Response) -> dict:
+@app.get('/api/random', status_code=200, response_model=None)
+async def api_random(response: Response) -> Response | dict:
+    # Fast path: serve a precomputed body and stamp it with the current time
+    entry = pool.pop()
+    if entry is not None:
+        body = entry + datetime.now().isoformat().encode() + b'"}'
+        return Response(content=body, media_type='application/json')
+
     try:
         return await asyncio.wait_for(random(), timeout=5)
 
@@ -0,0 +1,343 @@
+"""
+Load generator for the /api/random endpoint.
+
+Starts the FastAPI app in a child process with its audio stream replaced by a
+synthetic source, then drives it at a configurable concurrency and request
+rate. Reports throughput, latency percentiles, the fallback ratio, the
+number of timeout-driven 500s and client-side timeouts, and writes the
+summary as JSON so CI can gate releases on it.
+
+Usage:
+    python tests/load/run_load.py --requests 2000 --concurrency 32
+    python tests/load/run_load.py --rate 200 --duration 30 --max-p99-ms 50
+    python tests/load/run_load.py --url http://127.0.0.1:8000 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import time
+
+import httpx
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'results.json')
+
+# Must match the asyncio.wait_for timeout in server.api_random
+SERVER_TIMEOUT = 5.0
+# Seconds to wait for the server process to exit before killing it
+SHUTDOWN_TIMEOUT = 5.0
+# Status recorded when the client gives up waiting for a response
+CLIENT_TIMEOUT = 'timeout'
+
+
+class SyntheticStream:
+    """Stand-in for a PyAudio input stream that returns random sample bytes"""
+
+    def __init__(self, read_latency=0.0, fail_rate=0.0):
+        self.read_latency = read_latency
+        self.fail_rate = fail_rate
+        self.active = True
+
+    def read(self, frames, exception_on_overflow=True):
+        if self.read_latency:
+            time.sleep(self.read_latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            raise IOError("Synthetic read failure")
+        # paInt16 mono: 2 bytes per frame
+        return os.urandom(frames * 2)
+
+    def is_active(self):
+        return self.active
+
+    def stop_stream(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+
+def _serve(host, port, read_latency, fail_rate):
+    """Child process entry point: run the app against a synthetic source"""
+    sys.path.insert(0, SRC_DIR)
+    import uvicorn
+    import server
+
+    server.rng.stream = SyntheticStream(read_latency, fail_rate)
+    server.rng.device_index = 0
+    server.rng.microphone_available = True
+
+    uvicorn.run(server.app, host=host, port=port, log_level='warning')
+
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def _stop_server(process):
+    """Terminate the server process, killing it if it ignores SIGTERM"""
+    process.terminate()
+    process.join(timeout=SHUTDOWN_TIMEOUT)
+    if process.is_alive():
+        print(f"Server did not exit within {SHUTDOWN_TIMEOUT}s, killing it")
+        process.kill()
+        process.join()
+
+
+def _wait_ready(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/api/random", timeout=SERVER_TIMEOUT + 1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def _request(client, results, intended_start=None):
+    """Issue one request and record (latency, server_latency, status, source)"""
+    start = time.perf_counter()
+    try:
+        response = await client.get('/api/random')
+        status = response.status_code
+        source = response.json().get('source') if status == 200 else None
+    except httpx.TimeoutException:
+        status = CLIENT_TIMEOUT
+        source = None
+    except httpx.HTTPError:
+        status = None
+        source = None
+    end = time.perf_counter()
+
+    # For rate-driven runs, measure from the scheduled send time so that a
+    # stalled server shows up as latency instead of a lower send rate.
+    # server_latency excludes time spent queued on the client side.
+    origin = intended_start if intended_start is not None else start
+    results.append((end - origin, end - start, status, source))
+
+
+async def _run_closed(client, total, concurrency, results):
+    """Closed loop: `concurrency` workers each send back-to-back requests"""
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await _request(client, results)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def _run_open(client, total, concurrency, rate, results):
+    """Open loop: send at a fixed rate, capped at `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def one(intended_start):
+        async with semaphore:
+            await _request(client, results, intended_start)
+
+    tasks = []
+    for i in range(total):
+        intended_start = start + i / rate
+        delay = intended_start - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(intended_start)))
+    await asyncio.gather(*tasks)
+
+
+async def run_load(url, total, concurrency, rate=None):
+    """Drive the server and return a list of (latency, server_latency, status, source)"""
+    results = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits,
+                                 timeout=SERVER_TIMEOUT * 2) as client:
+        if rate is not None:
+            await _run_open(client, total, concurrency, rate, results)
+        else:
+            await _run_closed(client, total, concurrency, results)
+    return results
+
+
+def summarize(results, elapsed, timeout=SERVER_TIMEOUT):
+    """Aggregate raw results into the report written to JSON"""
+    latencies = sorted(r[0] for r in results)
+    ok = [r for r in results if r[2] == 200]
+    errors = [r for r in results if r[2] != 200]
+    # The server answers both timeouts and other failures with a plain 500,
+    # so a 500 whose own round trip took at least the server timeout is
+    # counted as a timeout
+    timeouts = [r for r in errors if r[2] == 500 and r[1] >= timeout]
+    client_timeouts = [r for r in errors if r[2] == CLIENT_TIMEOUT]
+    fallback = [r for r in ok if r[3] == 'fallback']
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        'requests': len(results),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+        'status_counts': {
+            str(status): sum(1 for r in results if r[2] == status)
+            for status in sorted({r[2] for r in results}, key=str)
+        },
+        'errors': len(errors),
+        'error_ratio': round(len(errors) / len(results), 4) if results else None,
+        'timeouts': len(timeouts),
+        'client_timeouts': len(client_timeouts),
+        'fallback_ratio': round(len(fallback) / len(ok), 4) if ok else None,
+    }
+
+
+def check_thresholds(summary, args):
+    """Return a list of human-readable gate failures (empty if all passed)"""
+    failures = []
+    if summary['requests'] == 0:
+        failures.append("no requests were sent")
+    p99 = summary['latency_ms']['p99']
+    if args.max_p99_ms is not None and p99 is not None and p99 > args.max_p99_ms:
+        failures.append(f"p99 latency {p99}ms > {args.max_p99_ms}ms")
+    error_ratio = summary['error_ratio']
+    if (args.max_error_ratio is not None and error_ratio is not None
+            and error_ratio > args.max_error_ratio):
+        failures.append(f"error ratio {error_ratio} > {args.max_error_ratio}")
+    if args.max_timeouts is not None and summary['timeouts'] > args.max_timeouts:
+        failures.append(f"timeouts {summary['timeouts']} > {args.max_timeouts}")
+    if (args.max_client_timeouts is not None
+            and summary['client_timeouts'] > args.max_client_timeouts):
+        failures.append(
+            f"client timeouts {summary['client_timeouts']} > {args.max_client_timeouts}")
+    fallback_ratio = summary['fallback_ratio']
+    if (args.max_fallback_ratio is not None and fallback_ratio is not None
+            and fallback_ratio > args.max_fallback_ratio):
+        failures.append(f"fallback ratio {fallback_ratio} > {args.max_fallback_ratio}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test for GET /api/random')
+    parser.add_argument('--url',
+                        help='Target an already running server instead of starting one')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Maximum requests in flight (default: 16)')
+    parser.add_argument('--rate', type=float,
+                        help='Target requests/second; omit for closed-loop max throughput')
+    parser.add_argument('--requests', type=int, default=1000,
+                        help='Total requests to send (default: 1000)')
+    parser.add_argument('--duration', type=float,
+                        help='With --rate, run for this many seconds instead of --requests')
+    parser.add_argument('--read-latency-ms', type=float, default=0.0,
+                        help='Simulated blocking time of each synthetic audio read')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='Probability that a synthetic audio read fails (forces fallback)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='Path of the JSON report (default: tests/load/results.json)')
+    parser.add_argument('--max-p99-ms', type=float)
+    parser.add_argument('--max-error-ratio', type=float)
+    parser.add_argument('--max-timeouts', type=int)
+    parser.add_argument('--max-client-timeouts', type=int)
+    parser.add_argument('--max-fallback-ratio', type=float)
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.rate is not None and args.rate <= 0:
+        parser.error('--rate must be greater than 0')
+
+    total = args.requests
+    if args.duration is not None:
+        if args.rate is None:
+            parser.error('--duration requires --rate')
+        total = int(args.duration * args.rate)
+    if total < 1:
+        parser.error('run must send at least 1 request (check --requests/--duration)')
+
+    server_process = None
+    url = args.url
+    if url is None:
+        port = _free_port(args.host)
+        url = f"http://{args.host}:{port}"
+        ctx = multiprocessing.get_context('spawn')
+        server_process = ctx.Process(
+            target=_serve,
+            args=(args.host, port, args.read_latency_ms / 1000, args.fail_rate),
+            daemon=True,
+        )
+        server_process.start()
+
+    results = []
+    elapsed = 0.0
+    error = None
+    try:
+        _wait_ready(url)
+        start = time.perf_counter()
+        results = asyncio.run(run_load(url, total, args.concurrency, args.rate))
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        if server_process is not None:
+            _stop_server(server_process)
+
+    summary = summarize(results, elapsed)
+    summary['config'] = {
+        'url': url,
+        'synthetic_source': server_process is not None,
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'read_latency_ms': args.read_latency_ms,
+        'fail_rate': args.fail_rate,
+    }
+    failures = check_thresholds(summary, args)
+    if error is not None:
+        failures.insert(0, f"run aborted: {error}")
+    summary['passed'] = not failures
+    summary['failures'] = failures
+
+    with open(args.output, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    latency = summary['latency_ms']
+    print(f"{summary['requests']} requests in {summary['elapsed_s']}s "
+          f"({summary['throughput_rps']} req/s)")
+    print(f"latency ms: p50={latency['p50']} p95={latency['p95']} "
+          f"p99={latency['p99']} max={latency['max']}")
+    print(f"errors={summary['errors']} timeouts={summary['timeouts']} "
+          f"client_timeouts={summary['client_timeouts']} "
+          f"fallback_ratio={summary['fallback_ratio']}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print(f"Report written to {args.output}")
+
+    return 0 if not failures else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,11 +5,16 @@ Tests that the /api/random endpoint:
 1. Returns valid response format
 2. Correctly reports the source (microphone or fallback)
 3. Correctly handles any error occured
+4. Serves unique precomputed responses from the response pool
 """
 
+import json
 import unittest
+from unittest import mock
 import sys
 import os
+import threading
+import time
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -133,6 +138,184 @@ class TestAPIErrorHandling(unittest.TestCase):
             self.assertIn('error', data,
                          "Error response should contain 'error' field")
 
+class FakeRNG:
+    """Stand-in for the shared RealRNG so tests don't touch audio hardware"""
+
+    def __init__(self, constant=None, delay=0.0):
+        self.constant = constant
+        self.delay = delay
+        self.calls = 0
+        self.calls_after_end = 0
+        self.ended = False
+        self.lock = threading.Lock()
+
+    def getRand(self):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls += 1
+            if self.ended:
+                self.calls_after_end += 1
+            value = self.constant if self.constant is not None else self.calls / 1e6
+        return (value, 'microphone')
+
+    def end(self):
+        self.ended = True
+
+
+class TestResponsePool(unittest.TestCase):
+    """Test the precomputed response pool and /api/random fast path"""
+
+    def setUp(self):
+        import server
+
+        # Swap out the shared RNG so lifespan shutdown can't end() it;
+        # tests that need a different fake replace it again
+        self.server = server
+        self.old_rng = server.rng
+        server.rng = FakeRNG()
+        server.pool.clear()
+
+    def tearDown(self):
+        self.server.rng = self.old_rng
+        self.server.pool.clear()
+
+    def test_pool_replaces_duplicate_values(self):
+        """Test that the pool replaces repeated values with fallback values"""
+        from server import ResponsePool
+
+        pool = ResponsePool(high=8, low=2)
+        self.assertTrue(pool.add(0.25, 'microphone'))
+        self.assertFalse(pool.add(0.25, 'microphone'),
+                         "Duplicate value should be replaced")
+        self.assertEqual(len(pool), 2)
+
+        first = json.loads(pool.pop() + b'"}')
+        second = json.loads(pool.pop() + b'"}')
+        self.assertEqual(first['rand'], 0.25)
+        self.assertNotEqual(second['rand'], 0.25)
+        self.assertEqual(second['source'], 'fallback')
+        self.assertIsNone(pool.pop(), "Empty pool should return None")
+
+        self.assertFalse(pool.unique(0.25, 'microphone')[2],
+                         "Recently issued value should still be replaced")
+
+    def test_dedup_window_without_pool(self):
+        """Test that disabling the pool keeps duplicate detection"""
+        from server import ResponsePool
+
+        pool = ResponsePool(high=0, low=0)
+        self.assertEqual(pool.window, ResponsePool.MIN_WINDOW)
+        self.assertTrue(pool.unique(0.5, 'microphone')[2])
+        self.assertFalse(pool.unique(0.5, 'microphone')[2])
+
+    def test_pool_config_validation(self):
+        """Test that bad REALRNG_POOL_* values are replaced with sane ones"""
+        from server import _pool_config
+
+        cases = [
+            ({}, (256, 64)),
+            ({'REALRNG_POOL_HIGH': 'abc'}, (256, 64)),
+            ({'REALRNG_POOL_HIGH': '-5'}, (256, 64)),
+            ({'REALRNG_POOL_HIGH': '0'}, (0, 0)),
+            ({'REALRNG_POOL_HIGH': '32'}, (32, 32)),
+            ({'REALRNG_POOL_LOW': '0'}, (256, 1)),
+            ({'REALRNG_POOL_HIGH': '100', 'REALRNG_POOL_LOW': '500'}, (100, 100)),
+        ]
+        for env, expected in cases:
+            with self.subTest(env=env):
+                with mock.patch.dict(os.environ, env):
+                    for name in ('REALRNG_POOL_HIGH', 'REALRNG_POOL_LOW'):
+                        if name not in env:
+                            os.environ.pop(name, None)
+                    self.assertEqual(_pool_config(), expected)
+
+    def test_api_serves_queued_values(self):
+        """Test that the fast path serves exactly the values queued in the pool"""
+        queued = [0.125, 0.25, 0.375]
+        for value in queued:
+            self.server.pool.add(value, 'microphone')
+
+        # No lifespan here, so the producer doesn't refill the pool
+        client = TestClient(app)
+        served = []
+        for i in range(len(queued)):
+            response = client.get("/api/random")
+            self.assertEqual(response.status_code, 200)
+
+            data = response.json()
+            self.assertEqual(set(data), {'rand', 'source', 'timestamp'})
+            self.assertEqual(data['source'], 'microphone')
+            served.append(data['rand'])
+            self.assertEqual(len(self.server.pool), len(queued) - i - 1)
+
+        self.assertEqual(served, queued)
+
+    def test_producer_fills_pool_and_stop_clears_it(self):
+        """Test that the lifespan producer fills the pool and shutdown empties it"""
+        with TestClient(app) as client:
+            deadline = time.monotonic() + 5
+            while len(self.server.pool) < self.server.pool.high:
+                self.assertLess(time.monotonic(), deadline, "Pool was never filled")
+                time.sleep(0.01)
+
+            response = client.get("/api/random")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(self.server.pool), self.server.pool.high - 1,
+                             "Response should have been taken from the pool")
+
+        self.assertEqual(len(self.server.pool), 0, "Shutdown should clear the pool")
+
+    def test_stuck_input_serves_fallback_values(self):
+        """Test that a constant RNG is answered with unique fallback values"""
+        self.server.rng = FakeRNG(constant=0.5)
+
+        with TestClient(app) as client:
+            time.sleep(0.3)
+            responses = [client.get("/api/random") for _ in range(5)]
+            calls = self.server.rng.calls
+
+        self.assertEqual([r.status_code for r in responses], [200] * 5)
+        values = [r.json()['rand'] for r in responses]
+        self.assertEqual(len(set(values)), len(values),
+                         "The same value must not be served twice")
+        self.assertNotIn(0.5, values[1:])
+        self.assertTrue(all(r.json()['source'] == 'fallback' for r in responses[1:]))
+        # One batch, then the producer backs off
+        self.assertLessEqual(calls, 2 * self.server.ResponsePool.BATCH + 5)
+
+    def test_shutdown_waits_for_in_flight_reads(self):
+        """Test that the RNG is never read after lifespan shutdown ends it"""
+        self.server.rng = FakeRNG(delay=0.01)
+
+        with TestClient(app):
+            time.sleep(0.05)
+
+        time.sleep(0.5)
+        self.assertTrue(self.server.rng.ended)
+        self.assertEqual(self.server.rng.calls_after_end, 0)
+
+    def test_concurrent_requests_with_empty_pool(self):
+        """Test that concurrent inline-path requests don't block the event loop"""
+        import asyncio
+        import httpx
+        self.server.rng.delay = 0.05
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(client.get("/api/random") for _ in range(8)))
+
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(asyncio.run(run())),
+                                  daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+        self.assertFalse(thread.is_alive(), "Concurrent requests deadlocked the server")
+        self.assertEqual([r.status_code for r in results], [200] * 8)
+        values = [r.json()['rand'] for r in results]
+        self.assertEqual(len(set(values)), len(values))
+
 if __name__ == '__main__':
     # Run tests with verbose output
     unittest.main(verbosity=2)
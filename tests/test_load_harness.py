@@ -0,0 +1,222 @@
+"""
+Tests for the load-test harness in tests/load/run_load.py.
+
+Tests that the harness:
+1. Computes nearest-rank percentiles correctly
+2. Classifies 200/500/transport errors and timeouts from fixed results
+3. Reports gate failures for the configured thresholds
+4. Drives a real server end to end and writes the JSON report
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import unittest
+import sys
+import os
+from unittest import mock
+
+import httpx
+
+# Add the load harness to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'load'))
+
+from run_load import CLIENT_TIMEOUT, _request, check_thresholds, main, percentile, summarize
+
+
+def gate_args(**overrides):
+    """Build the threshold arguments main() would pass, all unset by default"""
+    args = dict(max_p99_ms=None, max_error_ratio=None, max_timeouts=None,
+                max_client_timeouts=None, max_fallback_ratio=None)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+class TestPercentile(unittest.TestCase):
+    """Test the nearest-rank percentile helper"""
+
+    def test_empty_list(self):
+        self.assertIsNone(percentile([], 50))
+
+    def test_single_value(self):
+        for pct in (0, 50, 99, 100):
+            self.assertEqual(percentile([7], pct), 7)
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile(values, 0), 1)
+
+    def test_rounds_rank_up(self):
+        # 4 values: p50 is rank 2, p95 and p99 are rank 4
+        values = [10, 20, 30, 40]
+        self.assertEqual(percentile(values, 50), 20)
+        self.assertEqual(percentile(values, 95), 40)
+        self.assertEqual(percentile(values, 99), 40)
+
+
+class TestSummarize(unittest.TestCase):
+    """Test aggregation of (latency, server_latency, status, source) tuples"""
+
+    def setUp(self):
+        self.results = [
+            (0.010, 0.010, 200, 'microphone'),
+            (0.020, 0.020, 200, 'microphone'),
+            (0.030, 0.030, 200, 'fallback'),
+            (5.100, 5.050, 500, None),           # server-side timeout
+            (6.000, 0.005, 500, None),           # fast 500 that queued client-side
+            (10.00, 10.00, CLIENT_TIMEOUT, None),
+            (0.001, 0.001, None, None),          # connection error
+        ]
+        self.summary = summarize(self.results, elapsed=2.0)
+
+    def test_counts(self):
+        self.assertEqual(self.summary['requests'], 7)
+        self.assertEqual(self.summary['throughput_rps'], 3.5)
+        self.assertEqual(self.summary['status_counts'],
+                         {'200': 3, '500': 2, 'None': 1, 'timeout': 1})
+        self.assertEqual(self.summary['errors'], 4)
+        self.assertEqual(self.summary['error_ratio'], round(4 / 7, 4))
+
+    def test_timeouts_use_server_latency(self):
+        self.assertEqual(self.summary['timeouts'], 1,
+                         "Only the 500 that took the server timeout should count")
+        self.assertEqual(self.summary['client_timeouts'], 1)
+
+    def test_fallback_ratio_over_successes(self):
+        self.assertEqual(self.summary['fallback_ratio'], round(1 / 3, 4))
+
+    def test_latency_percentiles_use_first_field(self):
+        latency = self.summary['latency_ms']
+        self.assertEqual(latency['p50'], 30.0)
+        self.assertEqual(latency['max'], 10000.0)
+
+    def test_empty_results(self):
+        summary = summarize([], elapsed=0.0)
+        self.assertEqual(summary['requests'], 0)
+        self.assertIsNone(summary['throughput_rps'])
+        self.assertIsNone(summary['latency_ms']['p99'])
+        self.assertIsNone(summary['error_ratio'])
+        self.assertIsNone(summary['fallback_ratio'])
+
+
+class TestCheckThresholds(unittest.TestCase):
+    """Test release gate evaluation"""
+
+    def setUp(self):
+        self.summary = summarize([
+            (0.010, 0.010, 200, 'microphone'),
+            (0.200, 0.200, 200, 'fallback'),
+            (5.100, 5.100, 500, None),
+            (10.00, 10.00, CLIENT_TIMEOUT, None),
+        ], elapsed=1.0)
+
+    def test_no_gates_pass(self):
+        self.assertEqual(check_thresholds(self.summary, gate_args()), [])
+
+    def test_loose_gates_pass(self):
+        args = gate_args(max_p99_ms=20000, max_error_ratio=0.5, max_timeouts=1,
+                         max_client_timeouts=1, max_fallback_ratio=0.5)
+        self.assertEqual(check_thresholds(self.summary, args), [])
+
+    def test_each_gate_fails(self):
+        args = gate_args(max_p99_ms=100, max_error_ratio=0.1, max_timeouts=0,
+                         max_client_timeouts=0, max_fallback_ratio=0.1)
+        failures = check_thresholds(self.summary, args)
+        self.assertEqual(len(failures), 5, failures)
+        for name in ('p99', 'error ratio', 'timeouts', 'client timeouts', 'fallback'):
+            self.assertTrue(any(f.startswith(name) for f in failures),
+                            f"Missing failure for {name}: {failures}")
+
+    def test_empty_summary_fails(self):
+        failures = check_thresholds(summarize([], 0.0), gate_args())
+        self.assertEqual(failures, ["no requests were sent"])
+
+
+class TestRequest(unittest.TestCase):
+    """Test how a single request is timed and recorded"""
+
+    def record(self, handler, intended_start=None):
+        async def run():
+            results = []
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await _request(client, results, intended_start)
+            return results[0]
+        return asyncio.run(run())
+
+    def test_latency_measured_from_intended_start(self):
+        """Queueing before the send counts towards latency but not server latency"""
+        def handler(request):
+            return httpx.Response(200, json={'rand': 0.5, 'source': 'fallback'})
+
+        latency, server_latency, status, source = self.record(
+            handler, intended_start=time.perf_counter() - 1.0)
+        self.assertGreaterEqual(latency, 1.0)
+        self.assertLess(server_latency, 1.0)
+        self.assertEqual((status, source), (200, 'fallback'))
+
+    def test_client_timeout_status(self):
+        def handler(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        self.assertEqual(self.record(handler)[2], CLIENT_TIMEOUT)
+
+    def test_transport_error_status(self):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        self.assertIsNone(self.record(handler)[2])
+
+
+class TestArguments(unittest.TestCase):
+    """Test that runs which can't exercise the server are rejected"""
+
+    def test_invalid_arguments(self):
+        for argv in (['--concurrency', '0'], ['--requests', '0'], ['--rate', '0'],
+                     ['--rate', '-5'], ['--duration', '10'],
+                     ['--rate', '1', '--duration', '0.5']):
+            with self.subTest(argv=argv):
+                with self.assertRaises(SystemExit):
+                    main(argv)
+
+
+class TestEndToEnd(unittest.TestCase):
+    """Run the harness against the app with a synthetic audio source"""
+
+    def run_main(self, *argv):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            code = main(list(argv) + ['--output', output])
+            with open(output) as f:
+                return code, json.load(f)
+
+    def test_closed_loop(self):
+        code, report = self.run_main('--requests', '20', '--concurrency', '4',
+                                     '--max-error-ratio', '0')
+        self.assertEqual(code, 0, report['failures'])
+        self.assertTrue(report['passed'])
+        self.assertTrue(report['config']['synthetic_source'])
+        self.assertEqual(report['requests'], 20)
+        self.assertEqual(report['status_counts'], {'200': 20})
+        self.assertEqual(report['fallback_ratio'], 0.0)
+
+    def test_open_loop_fail_rate_forces_fallback(self):
+        # Disable the pool so pooled microphone values can't hide the fallback
+        with mock.patch.dict(os.environ, {'REALRNG_POOL_HIGH': '0'}):
+            code, report = self.run_main('--requests', '20', '--concurrency', '4',
+                                         '--rate', '50', '--fail-rate', '1')
+        self.assertEqual(code, 0, report['failures'])
+        self.assertEqual(report['requests'], 20)
+        self.assertEqual(report['status_counts'], {'200': 20})
+        self.assertEqual(report['fallback_ratio'], 1.0)
+
+
+if __name__ == '__main__':
+    # Run tests with verbose output
+    unittest.main(verbosity=2)